@@ -1,32 +1,138 @@
 from fastapi import FastAPI, Request, HTTPException
 import uvicorn
+import anyio
+from starlette.concurrency import (
+    run_in_threadpool,
+)  # to run the blocking llm call in a worker thread so the event loop stays free
 from fastapi.responses import (
     HTMLResponse,
     JSONResponse,
+    StreamingResponse,
 )  # fastapi by default sendind response as jason in api so HTMLResponse tells that i want to return or render the full Html through api
 from fastapi.templating import (
     Jinja2Templates,
 )  # jinja2 for searching the templates directory and handel the dynamic data like {"hello :"name"} i can put any value in the name
-import traceback  # to see proper error
+import logging  # log messages are only formatted when their level is enabled
 import re  # to play with the text data (reguler expression) which can used to search text, match , replac or extract
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, validator  # Import Pydantic BaseModel and Field
-from typing import List, Optional, Union  # For type hinting
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    field_validator,
+    model_validator,
+)  # Import Pydantic BaseModel and Field
+from typing import Annotated, Optional, Union  # For type hinting
 from langchain_huggingface import HuggingFaceEndpoint
-from langchain_community.llms import Ollama
-from langchain_core.prompts import PromptTemplate
+from langchain_ollama import ChatOllama  # native async streaming (astream) support
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
 from datetime import date, timedelta
 import sys  # To exit if model loading fails
-
+import os
+from functools import lru_cache
+from contextlib import asynccontextmanager
+import hashlib
+import httpx
+import math
+import json
+from collections import OrderedDict  # keeps insertion order so it works as a small LRU cache
+
+# optional: semantic cache (pip install sentence-transformers), the app works without it
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+
+# LOG_LEVEL can be given in any case ("debug", "DEBUG"); unknown values fall back to INFO
+LOG_LEVEL = logging.getLevelName(os.getenv("LOG_LEVEL", "INFO").upper())
+if not isinstance(LOG_LEVEL, int):
+    LOG_LEVEL = logging.INFO
+
+logging.basicConfig(
+    level=LOG_LEVEL,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
 
 ollama_model = "llama3:8b"
 # model import from ollama
 
+# ollama context window, max generated tokens and cpu threads (OMP_NUM_THREADS is used when set)
+# the context window holds the prompt and the generated text together
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "4096"))
+OLLAMA_NUM_PREDICT = 1024
+OLLAMA_NUM_THREAD = int(os.getenv("OMP_NUM_THREADS")) if os.getenv("OMP_NUM_THREADS") else None
+
+# http connection pool to the ollama server, shared by all requests of this worker
+# (more connections than LLM_THREAD_LIMIT so threads never wait for a free one)
+OLLAMA_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=40, max_connections=80)
+# a long description on cpu can take minutes, so only connecting has a short timeout
+OLLAMA_HTTP_TIMEOUT = httpx.Timeout(300.0, connect=5.0)
+
+# max number of generated descriptions kept in memory for identical requests
+RESPONSE_CACHE_SIZE = 1024
+
+# semantic cache: reuse a description when a similar request (e.g. "Sr. Python Developer" vs
+# "Senior Python Engineer") was already generated; set SEMANTIC_CACHE=0 to turn it off
+SEMANTIC_CACHE_MODEL = "all-MiniLM-L6-v2"
+SEMANTIC_CACHE_THRESHOLD = 0.92
+SEMANTIC_CACHE_SIZE = 10000
+
+# how many llm calls can run at the same time in the worker threads (raised from the anyio default of 40)
+LLM_THREAD_LIMIT = 64
+
+# check llm is start and make a async function that can run even the error in the upper code line
+# --- Startup / Shutdown (lifespan) ---
+# everything before `yield` runs once when the server starts, everything after it when the server stops
+@asynccontextmanager
+async def lifespan(app):
+    """Load LLM and Prompt on application startup and release them on shutdown."""
+    global llm, prompt_template, chain, semantic_cache
+    logger.info("Running startup...")
+    # size the default anyio threadpool used by run_in_threadpool
+    anyio.to_thread.current_default_thread_limiter().total_tokens = LLM_THREAD_LIMIT
+    llm = load_llm_model(ollama_model)
+    if llm is None:
+        logger.critical("FATAL: Failed to load LLM. Application cannot start.")
+        # Exit the application if the core component fails to load
+        sys.exit("LLM Loading Failed")
+
+    prompt_template = get_job_description_prompt()
+    if (
+        prompt_template is None
+    ):  # Should not happen based on current code, but good practice
+        logger.critical(
+            "FATAL: Failed to create prompt template. Application cannot start."
+        )
+        sys.exit("Prompt Template Creation Failed")
+
+    # build the chain once here and reuse it in every request
+    chain = prompt_template | llm | StrOutputParser()
+    semantic_cache = load_semantic_cache()
+    logger.info("Startup complete. LLM and prompt are ready.")
+
+    yield
+
+    # close the pooled http connections to ollama
+    # _client/_async_client are ChatOllama internals, so don't fail shutdown if a newer version renames them
+    sync_client = getattr(llm, "_client", None)
+    if sync_client is not None:
+        sync_client.close()
+    async_client = getattr(llm, "_async_client", None)
+    if async_client is not None:
+        await async_client.close()
+    logger.info("Shutdown complete.")
+
+
 # --- Initialize FastAPI App ---
 app = FastAPI(
     title="Job Description Generator API",
     description="API to generate job descriptions using Hugging Face LLM",
     version="1.0.0",
+    lifespan=lifespan,
 )
 # fastapi app
 
@@ -52,61 +158,51 @@ app.add_middleware(
 def load_llm_model(model_name="llama3:8b"):
     """Loads the Hugging Face Endpoint LLM."""
     global llm
-    print(f"Attempting to load LLM: {model_name}")
+    logger.info("Attempting to load LLM: %s", model_name)
 
     # if not api_token or not api_token.startswith("hf_"):
     #     print("ERROR: Invalid Hugging Face API Token format.")
     #     return None # Return None on failure
 
     try:
-        loaded_llm = Ollama(
+        loaded_llm = ChatOllama(
             model=ollama_model,
             # huggingfacehub_api_token=api_token,
             temperature=0.5,
-            num_predict=1024,
+            num_predict=OLLAMA_NUM_PREDICT,
+            # context window = prompt (JobDetailsInput limits it to OLLAMA_NUM_CTX - num_predict) + num_predict;
+            # a fixed size keeps the kv-cache the same for every request
+            num_ctx=OLLAMA_NUM_CTX,
+            num_thread=OLLAMA_NUM_THREAD,  # None lets ollama pick
+            keep_alive=-1,  # keep the model (and its cached prompt prefix) loaded between requests
+            # ChatOllama creates one sync and one async httpx client here and reuses them for
+            # every call, so connections to ollama stay open instead of being set up per request
+            client_kwargs={"limits": OLLAMA_HTTP_LIMITS, "timeout": OLLAMA_HTTP_TIMEOUT},
         )
-        print("LLM loaded successfully.")
+        logger.info("LLM loaded successfully.")
         return loaded_llm
     except ValueError as e:
-        print(f"Configuration error: {e}")
+        logger.error("Configuration error: %s", e)
         return None
     except ConnectionError as e:
-        print(f"Connection error: {e}")
+        logger.error("Connection error: %s", e)
         return None
     except Exception as e:
-        print(f"FATAL: Error loading LLM '{model_name}': {e}\n{traceback.format_exc()}")
+        logger.exception("FATAL: Error loading LLM '%s': %s", model_name, e)
         return None
 
 
 # know creating prompt which gives to the llm to genrate answer and also gives perameters
 
 
-# --- Prompt Template Function (mostly unchanged) ---
-def get_job_description_prompt():
-    """Creates the prompt template."""
-    template = """
+# --- Prompt Template Function ---
+# everything that is the same for every request goes in the system message at the start of the prompt,
+# so ollama can keep that part in its kv-cache and only process the job details of each new request
+SYSTEM_PREFIX = """
 You are an expert Human Resources professional specialized in writing professional job descriptions.
 Your task is to generate **two distinct sections** based on the provided details: 1) A short summary of key details, and 2) The main job description details. Adhere to the specified style and length preferences for the second section.
 
-**Job Details:**
-* Job Title: {job_title}
-* Company Name: {company_name}
-* Location: {location}
-* Workplace Type: {workplace}
-* Required Skills: {skills}
-* Minimum Experience (Years): {min_experience_years}
-* Experience Level Category: {exp_level_category}
-* Salary Range: {min_salary} - {max_salary}. **Note: This salary is in Pakistani Rupees (PKR).** Please state the range clearly using the PKR currency symbol (e.g., "PKR 100,000 - PKR 150,000 per month" or just "PKR 150,000 per month" if only one value is provided). Handle cases where values are "Not Specified" appropriately.
-* Application Deadline: {deadline}
-* Additional Notes: {notes}
-
-**Specific Inputs for Description:**
-* Qualification Details Provided: {qualification_details}
-* Benefits Details Provided: {benefits_details}
-
-**Output Requirements (Apply mainly to Section 2):**
-* Desired Style: {style_preference}
-* Desired Output Length: {output_length_preference}
+**Salary:** Salary values are in Pakistani Rupees (PKR). Please state the range clearly using the PKR currency symbol (e.g., "PKR 100,000 - PKR 150,000 per month" or just "PKR 150,000 per month" if only one value is provided). Handle cases where values are "Not Specified" appropriately.
 
 **Style Guidelines (Apply mainly to Section 2):**
 * **Indeed:** Clear, concise bullet points. Brief company overview. Direct.
@@ -131,84 +227,133 @@ Your task is to generate **two distinct sections** based on the provided details
 5.  Apply the requested **Desired Style** and **Desired Output Length** primarily to the **second section**.
 6.  Accurately use all provided input details across both sections as appropriate.
 7.  Do not include any conversational text, introductions, explanations, greetings, or any content other than the two specifically requested sections in the specified format.
+"""
+
+# the part of the prompt that changes with every request
+USER_TEMPLATE = """
+**Job Details:**
+* Job Title: {job_title}
+* Company Name: {company_name}
+* Location: {location}
+* Workplace Type: {workplace}
+* Required Skills: {skills}
+* Minimum Experience (Years): {min_experience_years}
+* Experience Level Category: {exp_level_category}
+* Salary Range (PKR): {min_salary} - {max_salary}
+* Application Deadline: {deadline}
+* Additional Notes: {notes}
+
+**Specific Inputs for Description:**
+* Qualification Details Provided: {qualification_details}
+* Benefits Details Provided: {benefits_details}
+
+**Output Requirements (Apply mainly to Section 2):**
+* Desired Style: {style_preference}
+* Desired Output Length: {output_length_preference}
 
 **Generated Output:**
 """
-    created_prompt = PromptTemplate(
-        template=template,
-        input_variables=[
-            "job_title",
-            "company_name",
-            "location",
-            "workplace",
-            "skills",
-            "min_experience_years",
-            "exp_level_category",
-            "min_salary",
-            "max_salary",
-            "deadline",
-            "notes",
-            "qualification_details",
-            "benefits_details",
-            "style_preference",
-            "output_length_preference",
-        ],
+
+
+def get_job_description_prompt():
+    """Creates the prompt template."""
+    created_prompt = ChatPromptTemplate.from_messages(
+        [("system", SYSTEM_PREFIX), ("human", USER_TEMPLATE)]
     )
-    print("Prompt template created.")
+    logger.info("Prompt template created.")
     return created_prompt
 
 
-# check llm is start and make a async function that can run even the error in the upper code line
-# --- Startup Event ---
-@app.on_event("startup")
-async def startup_event():  # async can works like that if the upper line of code take time to execute they cant effect on them they start processing this async function in the same time
-    """Load LLM and Prompt on application startup."""
-    global llm, prompt_template
-    print("Running startup event...")
-    llm = load_llm_model(ollama_model)
-    if llm is None:
-        print("FATAL: Failed to load LLM. Application cannot start.")
-        # Exit the application if the core component fails to load
-        sys.exit("LLM Loading Failed")
+# know check the data vaslidation the data comes from frontend is the right fomet like is str , int , or list etc;
 
-    prompt_template = get_job_description_prompt()
-    if (
-        prompt_template is None
-    ):  # Should not happen based on current code, but good practice
-        print("FATAL: Failed to create prompt template. Application cannot start.")
-        sys.exit("Prompt Template Creation Failed")
-    print("Startup complete. LLM and prompt are ready.")
 
+# --- Pydantic Model for Input Validation ---
+# size limits so a huge request is rejected with 422 before it reaches the llm
+MAX_SHORT_TEXT_LENGTH = 200  # titles, names, choices
+MAX_LONG_TEXT_LENGTH = 1500  # skills as text, notes, qualification and benefits details
+MAX_SKILLS = 30
+MAX_SKILL_LENGTH = 50
+MAX_EXPERIENCE_YEARS = 60
+MAX_SALARY = 100_000_000
+
+# everything sent ends up in the prompt, and the prompt has to leave room for num_predict tokens in
+# the context window; the single field limits above can add up to more, so the total is checked too.
+# 3 characters per token is on the safe side (english text is ~4), the extra 100 characters are for
+# values the prompt shows instead of empty inputs ("Not Specified", "None", formatted salaries)
+CHARS_PER_TOKEN = 3
+PROMPT_TOKEN_BUDGET = OLLAMA_NUM_CTX - OLLAMA_NUM_PREDICT
+MAX_TOTAL_INPUT_LENGTH = max(
+    0,
+    PROMPT_TOKEN_BUDGET * CHARS_PER_TOKEN
+    - len(SYSTEM_PREFIX)
+    - len(USER_TEMPLATE)
+    - 100,
+)
 
-# know check the data vaslidation the data comes from frontend is the right fomet like is str , int , or list etc;
+ShortText = Annotated[str, Field(max_length=MAX_SHORT_TEXT_LENGTH)]
+LongText = Annotated[str, Field(max_length=MAX_LONG_TEXT_LENGTH)]
 
 
-# --- Pydantic Model for Input Validation ---
 class JobDetailsInput(BaseModel):
-    job_title: str
-    company_name: str
-    location: str
-    workplace: str  # e.g., "Remote", "On-site", "Hybrid"
-    skills: Union[List[str], str]  # Accept list or comma-separated string
-    min_experience_years: Union[float, str]  # Can be number or text like "1-2"
-    exp_level_category: str  # e.g., "Entry Level", "Mid Level", "Senior Level"
+    # reject unknown fields, strip spaces around all strings and cap any string at 4000 characters
+    model_config = ConfigDict(
+        extra="forbid", str_strip_whitespace=True, str_max_length=4000
+    )
+
+    job_title: ShortText
+    company_name: ShortText
+    location: ShortText
+    workplace: ShortText  # e.g., "Remote", "On-site", "Hybrid"
+    skills: (
+        Annotated[
+            list[Annotated[str, Field(max_length=MAX_SKILL_LENGTH)]],
+            Field(max_length=MAX_SKILLS),
+        ]
+        | LongText
+    )  # Accept list or comma-separated string
+    min_experience_years: Union[
+        Annotated[float, Field(ge=0, le=MAX_EXPERIENCE_YEARS)],
+        Annotated[str, Field(max_length=20)],
+    ]  # Can be number or text like "1-2"
+    exp_level_category: ShortText  # e.g., "Entry Level", "Mid Level", "Senior Level"
     style_preference: (
-        str  # e.g., "Indeed", "LinkedIn", "LLM Generated (Full & Beautiful)"
+        ShortText  # e.g., "Indeed", "LinkedIn", "LLM Generated (Full & Beautiful)"
     )
-    output_length_preference: str  # e.g., "Concise", "Standard", "Detailed"
+    output_length_preference: ShortText  # e.g., "Concise", "Standard", "Detailed"
 
     # Optional fields with defaults
-    min_salary: Optional[Union[int, float]] = None
-    max_salary: Optional[Union[int, float]] = None
-    deadline: Optional[str] = Field(
+    min_salary: Optional[Union[int, float]] = Field(default=None, ge=0, le=MAX_SALARY)
+    max_salary: Optional[Union[int, float]] = Field(default=None, ge=0, le=MAX_SALARY)
+    deadline: Optional[ShortText] = Field(
         default_factory=lambda: (date.today() + timedelta(days=30)).strftime("%Y-%m-%d")
     )
-    notes: Optional[str] = None
-    qualification_details: Optional[str] = None
-    benefits_details: Optional[str] = None
+    notes: Optional[LongText] = None
+    qualification_details: Optional[LongText] = None
+    benefits_details: Optional[LongText] = None
+
+    # all text together has to fit in the prompt budget
+    @model_validator(mode="after")
+    def check_total_length(self):
+        total = sum(
+            len(", ".join(value) if isinstance(value, list) else value)
+            for value in self.__dict__.values()
+            if isinstance(value, (str, list))
+        )
+        if total > MAX_TOTAL_INPUT_LENGTH:
+            raise ValueError(
+                f"Request text is too long ({total} characters, at most {MAX_TOTAL_INPUT_LENGTH})"
+            )
+        return self
+
+    # an empty or null deadline is sent to the prompt as "Not Specified"
+    @field_validator("deadline")
+    @classmethod
+    def default_missing_deadline(cls, v):
+        return v or "Not Specified"
 
     # Validator to ensure skills is handled correctly if passed as string
-    @validator("skills", pre=True)
+    @field_validator("skills", mode="before")
+    @classmethod
     def ensure_skills_is_list_or_str(cls, v):
         if isinstance(v, str):
             # If you expect comma-separated, you could split here:
@@ -220,13 +365,70 @@ class JobDetailsInput(BaseModel):
         raise ValueError("Skills must be a list of strings or a single string")
 
 
+# --- Pydantic Model for the Response ---
+# with a response model fastapi serializes the result straight to json bytes in pydantic-core (rust)
+class JobDescriptionResponse(BaseModel):
+    status: str
+    job_description: str
+
+
 # know formet the incoming text into the bold text and setup discription template
 
 
-# --- Formatting Function (Unchanged) ---
+# --- Formatting Function ---
+# words that are made bold in every description (the request specific ones are added per call)
+STATIC_KEYWORDS = [
+    "PKR",
+    "Remote",
+    "On-site",
+    "Hybrid",
+    "Entry Level",
+    "Mid Level",
+    "Senior Level",
+    "Expert",
+    "Responsibilities",
+    "Requirements",
+    "Qualifications",
+    "Benefits",
+    "About Us",
+    "About the Role",
+    "About the Company",
+]
+
+
+def is_highlight_keyword(keyword):
+    """Skip empty values and the placeholders used for missing inputs."""
+    return (
+        isinstance(keyword, str)
+        and keyword
+        and keyword != "None"
+        and keyword != "Not Specified"
+    )
+
+
+@lru_cache(maxsize=256)
+def get_keyword_pattern(dynamic_keywords):
+    """Compile one regex for the static + given keywords (cached, so repeat requests reuse it)."""
+    # lower case match -> keyword, so the bold text keeps the case defined in the keyword list;
+    # this also drops keywords that only differ in case (e.g. workplace "Remote" is already static)
+    replacements = {}
+    for kw in dynamic_keywords + tuple(STATIC_KEYWORDS):
+        replacements.setdefault(kw.lower(), kw)
+
+    # Sort keywords by length (longest first) so the alternation prefers the longest match;
+    # this only runs when the pattern is not cached yet
+    keywords = sorted(replacements.values(), key=len, reverse=True)
+
+    # Case-insensitive match using word boundaries for safety
+    pattern = re.compile(
+        r"\b(?:" + "|".join(re.escape(kw) for kw in keywords) + r")\b", re.IGNORECASE
+    )
+    return pattern, replacements
+
+
 def format_job_description(text, data_dict):
     """Format the job description with HTML tags for bold text."""
-    # Keywords to highlight
+    # Keywords to highlight that depend on the request
     keywords = [
         data_dict.get("job_title"),
         data_dict.get("company_name"),
@@ -235,21 +437,6 @@ def format_job_description(text, data_dict):
         data_dict.get("exp_level_category"),
         f"{data_dict.get('min_experience_years')} years",
         f"{data_dict.get('min_experience_years')} year",
-        "PKR",
-        "Remote",
-        "On-site",
-        "Hybrid",
-        "Entry Level",
-        "Mid Level",
-        "Senior Level",
-        "Expert",
-        "Responsibilities",
-        "Requirements",
-        "Qualifications",
-        "Benefits",
-        "About Us",
-        "About the Role",
-        "About the Company",
     ]
 
     # Add skills to keywords (handle both list and string)
@@ -261,43 +448,233 @@ def format_job_description(text, data_dict):
     elif isinstance(skills, list):
         keywords.extend(skills)
 
-    # Filter out None or empty keywords before sorting
-    keywords = [kw for kw in keywords if kw]
-
-    # Sort keywords by length (longest first) to avoid partial replacements
-    keywords.sort(key=len, reverse=True)
-
-    formatted_text = text
-    for keyword in keywords:
-        # Ensure keyword is a non-empty string before attempting regex
-        if (
-            isinstance(keyword, str)
-            and keyword
-            and keyword != "None"
-            and keyword != "Not Specified"
-        ):
-            try:
-                # Case-insensitive replacement using word boundaries for safety
-                pattern = re.compile(r"\b" + re.escape(keyword) + r"\b", re.IGNORECASE)
-                # Replacement using a function to preserve original case in <strong> tag - slightly more complex
-                # def replace_func(match):
-                #     return f"<strong>{match.group(0)}</strong>"
-                # formatted_text = pattern.sub(replace_func, formatted_text)
-
-                # Simpler replacement (makes keyword bold with the case defined in `keywords` list):
-                formatted_text = pattern.sub(
-                    f"<strong>{keyword}</strong>", formatted_text
-                )
-            except re.error as e:
-                print(f"Regex error for keyword '{keyword}': {e}")  # Log regex errors
-
-    return formatted_text
+    # drop empty values and duplicates (keeping order) so equal requests share one cached pattern
+    dynamic_keywords = tuple(dict.fromkeys(kw for kw in keywords if is_highlight_keyword(kw)))
+    pattern, replacements = get_keyword_pattern(dynamic_keywords)
+
+    # single pass over the text for all keywords
+    def replace_func(match):
+        found = match.group(0)
+        return f"<strong>{replacements.get(found.lower(), found)}</strong>"
+
+    return pattern.sub(replace_func, text)
+
+
+# --- Prompt Input Builder ---
+def format_salary(value):
+    """Salary with thousands separators, or "Not Specified" for a missing/zero value."""
+    # isfinite only for floats: a very large int can't be converted to float and would raise
+    is_number = isinstance(value, int) or (
+        isinstance(value, float) and math.isfinite(value)
+    )
+    if is_number and value > 0:
+        return f"{int(value):,}"
+    return "Not Specified"
+
+
+def format_experience(value):
+    """Years of experience as text, without a trailing ".0" (3 and "3" both give "3")."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def build_input_data(data):
+    """Convert the validated request into the dict of prompt variables."""
+    # --- Prepare Input for LangChain ---
+    # Convert skills list/string back to string for the prompt if needed
+    # (The template expects a single string)
+    if isinstance(data.skills, list):
+        skills_str = ", ".join(data.skills)
+    else:
+        skills_str = data.skills  # Assume it's already a suitable string
+
+    # Create the input dictionary from the Pydantic model and convert the fields the prompt needs as text
+    input_data_dict = data.model_dump()
+    input_data_dict.update(
+        skills=skills_str,
+        min_experience_years=format_experience(data.min_experience_years),
+        min_salary=format_salary(data.min_salary),
+        max_salary=format_salary(data.max_salary),
+        notes=data.notes or "None",
+        qualification_details=data.qualification_details or "None",
+        benefits_details=data.benefits_details or "None",
+    )
+    return input_data_dict
+
+
+# --- Response Cache ---
+# identical requests give (almost) the same text, so keep the last generated ones and skip the llm
+_resp_cache = OrderedDict()
+
+
+def make_cache_key(input_data_dict):
+    """Stable hash of the prompt variables, used as the cache key."""
+    return hashlib.sha1(
+        json.dumps(input_data_dict, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def get_cached_response(key):
+    """Return the cached text for this key (and mark it recently used) or None."""
+    cached = _resp_cache.get(key)
+    if cached is not None:
+        _resp_cache.move_to_end(key)
+    return cached
+
+
+def store_cached_response(key, text):
+    """Save generated text, dropping the least recently used entry when full."""
+    _resp_cache[key] = text
+    _resp_cache.move_to_end(key)
+    if len(_resp_cache) > RESPONSE_CACHE_SIZE:
+        _resp_cache.popitem(last=False)
+
+
+# --- Semantic Response Cache ---
+# fields that may differ from the cached request; every other prompt variable must match exactly
+# (skills are listed in the text and can't be swapped reliably, so they have to match exactly too)
+SEMANTIC_FIELDS = ("job_title", "company_name", "location")
+# fields whose old value is replaced with the new one in a reused description
+SUBSTITUTED_FIELDS = SEMANTIC_FIELDS
+
+
+class SemanticCache:
+    """Keeps embeddings of past requests and finds a generated text for a similar one."""
+
+    def __init__(
+        self,
+        embed_model,
+        threshold=SEMANTIC_CACHE_THRESHOLD,
+        maxsize=SEMANTIC_CACHE_SIZE,
+    ):
+        self.embed_model = embed_model
+        self.threshold = threshold
+        self.maxsize = maxsize
+        dim = embed_model.get_sentence_embedding_dimension()
+        # one row per cached request, rows are reused when the cache is full
+        self._vectors = np.zeros((maxsize, dim), dtype=np.float32)
+        self._last_used = np.full(maxsize, -1, dtype=np.int64)  # -1 = free slot
+        self._entries = [None] * maxsize  # (exact fields key, input dict, text)
+        self._clock = 0
+
+    @staticmethod
+    def _signature(input_data_dict):
+        return " | ".join(
+            str(input_data_dict.get(field))
+            for field in ("job_title", "skills", "exp_level_category")
+        )
+
+    @staticmethod
+    def _exact_key(input_data_dict):
+        return make_cache_key(
+            {k: v for k, v in input_data_dict.items() if k not in SEMANTIC_FIELDS}
+        )
+
+    async def embed(self, input_data_dict):
+        """Embed the request signature (runs the model in the threadpool)."""
+        return await run_in_threadpool(
+            self.embed_model.encode,
+            self._signature(input_data_dict),
+            normalize_embeddings=True,
+        )
+
+    def lookup(self, vector, input_data_dict):
+        """Return a cached text adapted to this request, or None when nothing is similar enough."""
+        exact_key = self._exact_key(input_data_dict)
+        scores = self._vectors @ vector  # vectors are normalized, so this is the cosine similarity
+        for slot in np.argsort(scores)[::-1]:
+            if scores[slot] <= self.threshold:
+                break
+            if self._last_used[slot] < 0:  # free slot
+                continue
+            entry_key, cached_input, text = self._entries[slot]
+            if entry_key != exact_key:
+                continue
+            self._clock += 1
+            self._last_used[slot] = self._clock
+            return self._substitute(text, cached_input, input_data_dict)
+        return None
+
+    def add(self, vector, input_data_dict, text):
+        """Store a generated text, replacing the least recently used entry when full."""
+        slot = int(np.argmin(self._last_used))
+        self._clock += 1
+        self._vectors[slot] = vector
+        self._last_used[slot] = self._clock
+        self._entries[slot] = (self._exact_key(input_data_dict), input_data_dict, text)
+
+    @staticmethod
+    def _substitute(text, cached_input, input_data_dict):
+        # lower case old value -> new value
+        replacements = {}
+        for field in SUBSTITUTED_FIELDS:
+            old, new = cached_input.get(field), input_data_dict.get(field)
+            if old and new and old != new:
+                replacements.setdefault(old.lower(), new)
+        if not replacements:
+            return text
+
+        # one pass with word boundaries (like get_keyword_pattern), so "Go" does not touch "Good"
+        # and a new title that contains the old company name is not replaced again
+        olds = sorted(replacements, key=len, reverse=True)
+        pattern = re.compile(
+            r"\b(?:" + "|".join(re.escape(old) for old in olds) + r")\b", re.IGNORECASE
+        )
+        return pattern.sub(
+            lambda match: replacements.get(match.group(0).lower(), match.group(0)), text
+        )
+
+
+semantic_cache = None
+
+
+def load_semantic_cache():
+    """Load the embedding model for the semantic cache, or return None when it is not available."""
+    if SentenceTransformer is None or os.getenv("SEMANTIC_CACHE", "1") == "0":
+        logger.info("Semantic cache disabled.")
+        return None
+    try:
+        cache = SemanticCache(SentenceTransformer(SEMANTIC_CACHE_MODEL))
+        logger.info("Semantic cache loaded (%s).", SEMANTIC_CACHE_MODEL)
+        return cache
+    except Exception as e:
+        logger.warning("Could not load semantic cache model, continuing without it: %s", e)
+        return None
+
+
+async def lookup_cached_response(input_data_dict):
+    """Check the exact cache, then the semantic cache.
+
+    Returns (cached text or None, exact cache key, embedding or None).
+    """
+    cache_key = make_cache_key(input_data_dict)
+    cached_response = get_cached_response(cache_key)
+    vector = None
+    if cached_response is None and semantic_cache is not None:
+        vector = await semantic_cache.embed(input_data_dict)
+        cached_response = semantic_cache.lookup(vector, input_data_dict)
+    return cached_response, cache_key, vector
+
+
+def remember_response(cache_key, vector, input_data_dict, text):
+    """Put a newly generated text in both caches."""
+    # an empty generation is a failed one, caching it would return it for every identical request
+    if not text:
+        return
+    store_cached_response(cache_key, text)
+    if semantic_cache is not None and vector is not None:
+        semantic_cache.add(vector, input_data_dict, text)
 
 
 # know its time to make api endpoint final step to send  data to the frontend for submitting the final job description outcome
 # it can process data and gives to the llm and save their genrated text and return their clean text to the function
 # --- API Endpoint ---
-@app.post("/generate_job_description", tags=["Job Description"])
+@app.post(
+    "/generate_job_description",
+    tags=["Job Description"],
+    response_model=JobDescriptionResponse,
+)
 async def generate_job_description_api(data: JobDetailsInput):
     """
     API endpoint to generate job description based on input details.
@@ -306,103 +683,136 @@ async def generate_job_description_api(data: JobDetailsInput):
 
     # Check if LLM is loaded (should be handled by startup, but double-check)
     if llm is None or prompt_template is None:
-        print("Error: LLM or Prompt Template not available.")
+        logger.error("Error: LLM or Prompt Template not available.")
         raise HTTPException(
             status_code=500, detail="Server error: LLM or Prompt not initialized"
         )
 
-    print(f"Received request data: {data.dict()}")  # Log Pydantic model data
+    logger.debug("Received request data: %s", data)  # only formatted when DEBUG is on
 
-    # --- Prepare Input for LangChain ---
-    # Convert skills list/string back to string for the prompt if needed
-    # (The template expects a single string)
-    if isinstance(data.skills, list):
-        skills_str = ", ".join(data.skills)
-    else:
-        skills_str = data.skills  # Assume it's already a suitable string
+    input_data_dict = build_input_data(data)
 
-    # Format salary strings (handle None/0 gracefully)
-    try:
-        min_salary_str = (
-            f"{int(data.min_salary):,}"
-            if data.min_salary is not None and data.min_salary > 0
-            else "Not Specified"
-        )
-    except (ValueError, TypeError):
-        min_salary_str = "Not Specified"
-    try:
-        max_salary_str = (
-            f"{int(data.max_salary):,}"
-            if data.max_salary is not None and data.max_salary > 0
-            else "Not Specified"
-        )
-    except (ValueError, TypeError):
-        max_salary_str = "Not Specified"
-
-    # Create the input dictionary using data from the Pydantic model
-    input_data_dict = {
-        "job_title": data.job_title,
-        "company_name": data.company_name,
-        "location": data.location,
-        "workplace": data.workplace,
-        "skills": skills_str,
-        "min_experience_years": str(
-            data.min_experience_years
-        ),  # Ensure string if needed by prompt
-        "exp_level_category": data.exp_level_category,
-        "min_salary": min_salary_str,
-        "max_salary": max_salary_str,
-        "deadline": (
-            data.deadline if data.deadline else "Not Specified"
-        ),  # Handle potential None from Pydantic default_factory edge case
-        "notes": data.notes if data.notes else "None",
-        "qualification_details": (
-            data.qualification_details if data.qualification_details else "None"
-        ),
-        "benefits_details": data.benefits_details if data.benefits_details else "None",
-        "style_preference": data.style_preference,
-        "output_length_preference": data.output_length_preference,
-    }
+    # --- Check Cache ---
+    cached_response, cache_key, vector = await lookup_cached_response(input_data_dict)
+    if cached_response is not None:
+        logger.debug("Returning cached job description.")
+        return {
+            "status": "success",
+            "job_description": format_job_description(cached_response, input_data_dict),
+        }
 
     # --- Invoke LLM Chain ---
     try:
-        # Note: HuggingFaceEndpoint might not have a native async 'ainvoke'.
-        # If this call is blocking and impacts performance under load,
-        # consider running it in a separate thread pool using asyncio.to_thread
-        # or starlette.concurrency.run_in_threadpool
-        chain = prompt_template | llm
-        response = chain.invoke(input_data_dict)  # Using synchronous invoke
+        # chain.invoke is blocking, so run it in a worker thread; otherwise the
+        # event loop (and every other request, even /health) waits for the llm
+        response = await run_in_threadpool(chain.invoke, input_data_dict)
 
         if isinstance(response, str):
             clean_response = response.strip()
+            remember_response(cache_key, vector, input_data_dict, clean_response)
 
             # Format the response with HTML tags for bold text
             # Pass the original input_data_dict for keyword extraction
             formatted_response = format_job_description(clean_response, input_data_dict)
 
-            print("Successfully generated job description.")
-            print(formatted_response)
+            logger.info("Successfully generated job description.")
             return {
                 "status": "success",
                 "job_description": formatted_response,
                 # "raw_description": clean_response
             }  # FastAPI automatically converts dict to JSON response
         else:
-            print(f"Error: LLM returned unexpected type: {type(response)}")
+            logger.error("Error: LLM returned unexpected type: %s", type(response))
             raise HTTPException(
                 status_code=500, detail="LLM returned unexpected response type"
             )
 
     except Exception as e:
-        print(
-            f"Error during LLM invocation or processing: {e}\n{traceback.format_exc()}"
-        )
+        logger.exception("Error during LLM invocation or processing: %s", e)
         raise HTTPException(
             status_code=500,
             detail="An error occurred while generating the description.",
         )
 
 
+def sse_event(payload):
+    """One server-sent event frame with a json payload."""
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+# same as above but streams the description as server-sent events while it is generated, so the client sees text right away
+# every frame is {"chunk": "..."} with bold formatting already applied, the last one is {"done": true}
+@app.post("/generate_job_description/stream", tags=["Job Description"])
+async def stream_job_description_api(data: JobDetailsInput):
+    """
+    API endpoint to stream the formatted job description while it is being generated.
+    """
+    global llm, prompt_template
+
+    if llm is None or prompt_template is None:
+        logger.error("Error: LLM or Prompt Template not available.")
+        raise HTTPException(
+            status_code=500, detail="Server error: LLM or Prompt not initialized"
+        )
+
+    logger.debug("Received streaming request data: %s", data)
+    input_data_dict = build_input_data(data)
+    cached_response, cache_key, vector = await lookup_cached_response(input_data_dict)
+    if cached_response is not None:
+        logger.debug("Returning cached job description.")
+        cached_events = [
+            sse_event({"chunk": format_job_description(cached_response, input_data_dict)}),
+            sse_event({"done": True}),
+        ]
+        return StreamingResponse(iter(cached_events), media_type="text/event-stream")
+
+    async def event_gen():
+        chunks = []
+        pending = ""  # text received after the last finished line
+        held = ""  # whitespace at the end of the sent text, only sent once more text follows
+        started = False
+
+        def next_part(text, last=False):
+            # strip like the json endpoint does: nothing before the first text, nothing after the last
+            nonlocal held, started
+            text = held + text
+            if not started:
+                text = text.lstrip()
+            body = text.rstrip()
+            held = "" if last else text[len(body) :]
+            if body:
+                started = True
+            return body
+
+        try:
+            async for chunk in chain.astream(input_data_dict):
+                chunks.append(chunk)
+                pending += chunk
+                # keywords never span lines, so every finished line can be formatted and sent once
+                line_end = pending.rfind("\n")
+                if line_end != -1:
+                    finished, pending = pending[: line_end + 1], pending[line_end + 1 :]
+                    body = next_part(finished)
+                    if body:
+                        yield sse_event({"chunk": format_job_description(body, input_data_dict)})
+            body = next_part(pending, last=True)
+            if body:
+                yield sse_event({"chunk": format_job_description(body, input_data_dict)})
+            yield sse_event({"done": True})
+            # only cache when the whole text came through
+            remember_response(
+                cache_key, vector, input_data_dict, "".join(chunks).strip()
+            )
+        except Exception as e:
+            # headers are already sent, so log it and tell the client in the stream
+            logger.exception("Error during LLM streaming: %s", e)
+            yield sse_event(
+                {"error": "An error occurred while generating the description."}
+            )
+
+    return StreamingResponse(event_gen(), media_type="text/event-stream")
+
+
 # know extra perameter of health
 # --- Health Check Endpoint (Good Practice) ---
 @app.get("/health", tags=["Health Check"])
@@ -447,4 +857,20 @@ async def home(request: Request):
 
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    # python main.py -> single worker with auto reload for development
+    # WEB_CONCURRENCY=4 python main.py -> several worker processes (no reload), one per cpu core is a good start
+    # every worker only opens an http client to ollama, so extra workers are cheap
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if workers > 1:
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=workers,
+            limit_concurrency=int(os.getenv("LIMIT_CONCURRENCY", "40")),
+            # libuv based event loop and C http parser (both come with uvicorn[standard], not on windows)
+            loop="uvloop",
+            http="httptools",
+        )
+    else:
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
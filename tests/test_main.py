@@ -0,0 +1,290 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    main._resp_cache.clear()
+    yield
+    main._resp_cache.clear()
+
+
+# --- Response Cache ---
+def test_cache_returns_stored_text():
+    key = main.make_cache_key({"job_title": "Dev"})
+    assert main.get_cached_response(key) is None
+    main.store_cached_response(key, "text")
+    assert main.get_cached_response(key) == "text"
+
+
+def test_cache_key_ignores_dict_order():
+    assert main.make_cache_key({"a": 1, "b": 2}) == main.make_cache_key({"b": 2, "a": 1})
+
+
+def test_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(main, "RESPONSE_CACHE_SIZE", 2)
+    main.store_cached_response("a", "A")
+    main.store_cached_response("b", "B")
+    main.get_cached_response("a")  # "a" is now more recently used than "b"
+    main.store_cached_response("c", "C")
+
+    assert main.get_cached_response("b") is None
+    assert main.get_cached_response("a") == "A"
+    assert main.get_cached_response("c") == "C"
+
+
+# --- API Endpoints (with a fake chat model instead of ollama) ---
+GENERATED_TEXT = (
+    "**Title:** Python Developer\n--- DETAILS ---\n**Responsibilities:**\n- Build Remote APIs"
+)
+
+REQUEST_DATA = {
+    "job_title": "Python Developer",
+    "company_name": "Acme",
+    "location": "Lahore",
+    "workplace": "Remote",
+    "skills": ["Python", "FastAPI"],
+    "min_experience_years": 3,
+    "exp_level_category": "Mid Level",
+    "style_preference": "Indeed",
+    "output_length_preference": "Concise",
+}
+
+
+class FailingChatModel(FakeListChatModel):
+    def _call(self, *args, **kwargs):
+        raise RuntimeError("ollama is down")
+
+
+def make_client(monkeypatch, llm):
+    monkeypatch.setattr(main, "load_llm_model", lambda *args, **kwargs: llm)
+    monkeypatch.setattr(main, "load_semantic_cache", lambda: None)
+    return TestClient(main.app)
+
+
+def test_generate_returns_formatted_description(monkeypatch):
+    llm = FakeListChatModel(responses=[GENERATED_TEXT])
+    with make_client(monkeypatch, llm) as client:
+        response = client.post("/generate_job_description", json=REQUEST_DATA)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "success"
+    assert "<strong>Python Developer</strong>" in body["job_description"]
+    assert "<strong>Remote</strong>" in body["job_description"]
+
+
+def test_generate_uses_cache_for_identical_requests(monkeypatch):
+    # the second response would show up if the llm was called again
+    llm = FakeListChatModel(responses=[GENERATED_TEXT, "something else"])
+    with make_client(monkeypatch, llm) as client:
+        first = client.post("/generate_job_description", json=REQUEST_DATA).json()
+        second = client.post("/generate_job_description", json=REQUEST_DATA).json()
+
+    assert first == second
+
+
+@pytest.mark.parametrize("path", ["/generate_job_description", "/generate_job_description/stream"])
+def test_empty_generation_is_not_cached(monkeypatch, path):
+    llm = FakeListChatModel(responses=["  \n ", GENERATED_TEXT])
+    with make_client(monkeypatch, llm) as client:
+        client.post(path, json=REQUEST_DATA)
+        assert not main._resp_cache
+        response = client.post("/generate_job_description", json=REQUEST_DATA)
+
+    assert "<strong>Python Developer</strong>" in response.json()["job_description"]
+
+
+def test_generate_returns_500_when_llm_fails(monkeypatch):
+    with make_client(monkeypatch, FailingChatModel(responses=[])) as client:
+        response = client.post("/generate_job_description", json=REQUEST_DATA)
+
+    assert response.status_code == 500
+    assert not main._resp_cache
+
+
+def read_events(response):
+    return [
+        json.loads(line[len("data: ") :])
+        for line in response.text.split("\n\n")
+        if line.startswith("data: ")
+    ]
+
+
+@pytest.mark.parametrize("generated", [GENERATED_TEXT, "\n\n  " + GENERATED_TEXT + "\n \n\n"])
+def test_stream_sends_formatted_events(monkeypatch, generated):
+    llm = FakeListChatModel(responses=[generated])
+    with make_client(monkeypatch, llm) as client:
+        response = client.post("/generate_job_description/stream", json=REQUEST_DATA)
+        # the same request again comes from the cache, and through the json endpoint
+        cached_response = client.post("/generate_job_description/stream", json=REQUEST_DATA)
+        json_response = client.post("/generate_job_description", json=REQUEST_DATA)
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = read_events(response)
+    assert len(events) > 2  # sent line by line, not all at once
+    assert events[-1] == {"done": True}
+    text = "".join(event["chunk"] for event in events[:-1])
+    input_data_dict = main.build_input_data(main.JobDetailsInput(**REQUEST_DATA))
+    assert text == main.format_job_description(GENERATED_TEXT, input_data_dict)
+    assert read_events(cached_response)[0]["chunk"] == text
+    assert json_response.json()["job_description"] == text
+
+
+def test_request_with_too_long_notes_is_rejected(monkeypatch):
+    llm = FakeListChatModel(responses=[GENERATED_TEXT])
+    data = dict(REQUEST_DATA, notes="x" * (main.MAX_LONG_TEXT_LENGTH + 1))
+    with make_client(monkeypatch, llm) as client:
+        response = client.post("/generate_job_description", json=data)
+
+    assert response.status_code == 422
+
+
+def test_fields_at_their_own_limits_are_rejected_together():
+    long_text = "x" * main.MAX_LONG_TEXT_LENGTH
+    data = dict(
+        REQUEST_DATA,
+        skills=long_text,
+        notes=long_text,
+        qualification_details=long_text,
+        benefits_details=long_text,
+    )
+    with pytest.raises(ValidationError, match="too long"):
+        main.JobDetailsInput(**data)
+
+
+def test_largest_accepted_request_fits_the_prompt_budget():
+    long_fields = ("skills", "notes", "qualification_details", "benefits_details")
+    data = dict(
+        REQUEST_DATA,
+        min_salary=main.MAX_SALARY,
+        max_salary=main.MAX_SALARY,
+        deadline="2026-01-01",
+    )
+    # share whatever the total limit leaves between the long fields
+    used = sum(len(str(v)) for k, v in data.items() if k not in long_fields)
+    size = min(
+        (main.MAX_TOTAL_INPUT_LENGTH - used) // len(long_fields), main.MAX_LONG_TEXT_LENGTH
+    )
+    data.update({field: "x" * size for field in long_fields})
+
+    input_data_dict = main.build_input_data(main.JobDetailsInput(**data))
+    messages = main.get_job_description_prompt().format_messages(**input_data_dict)
+
+    prompt_length = sum(len(message.content) for message in messages)
+    assert prompt_length <= main.PROMPT_TOKEN_BUDGET * main.CHARS_PER_TOKEN
+
+
+@pytest.mark.parametrize("salary", [-1, main.MAX_SALARY + 1, 10**400])
+def test_salary_out_of_range_is_rejected(salary):
+    with pytest.raises(ValidationError):
+        main.JobDetailsInput(**dict(REQUEST_DATA, min_salary=salary))
+
+
+# --- Prompt Input ---
+@pytest.mark.parametrize(
+    "value, expected", [(3, "3"), (3.0, "3"), ("3", "3"), (2.5, "2.5"), ("1-2", "1-2")]
+)
+def test_experience_is_sent_without_trailing_zero(value, expected):
+    data = main.JobDetailsInput(**dict(REQUEST_DATA, min_experience_years=value))
+    assert main.build_input_data(data)["min_experience_years"] == expected
+
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, "Not Specified"),
+        (0, "Not Specified"),
+        (-5000, "Not Specified"),
+        (150000.75, "150,000"),
+        (float("inf"), "Not Specified"),
+        (10**400, f"{10**400:,}"),  # too large for a float
+    ],
+)
+def test_format_salary(value, expected):
+    assert main.format_salary(value) == expected
+
+# --- Semantic Response Cache ---
+class FakeEmbedModel:
+    """Embeds a signature as a fixed vector per known phrase, so similarity is predictable."""
+
+    VECTORS = {
+        "Senior Python Engineer": [1.0, 0.0, 0.0],
+        "Sr Python Developer": [0.99, 0.1, 0.0],
+        "Accountant": [0.0, 0.0, 1.0],
+    }
+
+    def get_sentence_embedding_dimension(self):
+        return 3
+
+    def encode(self, text, normalize_embeddings=True):
+        import numpy as np
+
+        vector = np.array(self.VECTORS[text.split(" | ")[0]], dtype=np.float32)
+        return vector / np.linalg.norm(vector)
+
+
+CACHED_INPUT = {
+    "job_title": "Senior Python Engineer",
+    "company_name": "Go",
+    "location": "Lahore",
+    "skills": "Python, Django",
+    "exp_level_category": "Senior Level",
+    "min_salary": "100,000",
+}
+CACHED_TEXT = "Senior Python Engineer at Go, Lahore. Good engineers at Go build goals."
+
+
+@pytest.fixture
+def semantic_cache():
+    pytest.importorskip("numpy")
+    cache = main.SemanticCache(FakeEmbedModel(), maxsize=4)
+    vector = asyncio.run(cache.embed(CACHED_INPUT))
+    cache.add(vector, CACHED_INPUT, CACHED_TEXT)
+    return cache
+
+
+def lookup(cache, input_data_dict):
+    return cache.lookup(asyncio.run(cache.embed(input_data_dict)), input_data_dict)
+
+
+def test_substitute_only_replaces_whole_words():
+    new_input = dict(CACHED_INPUT, company_name="Acme")
+    text = main.SemanticCache._substitute(CACHED_TEXT, CACHED_INPUT, new_input)
+    assert text == "Senior Python Engineer at Acme, Lahore. Good engineers at Acme build goals."
+
+
+def test_substitute_does_not_replace_inside_new_values():
+    # the new title contains the old company name, it must not be replaced a second time
+    new_input = dict(CACHED_INPUT, job_title="Go Developer", company_name="Acme")
+    text = main.SemanticCache._substitute(CACHED_TEXT, CACHED_INPUT, new_input)
+    assert text.startswith("Go Developer at Acme, Lahore.")
+
+
+def test_lookup_reuses_similar_request(semantic_cache):
+    new_input = dict(
+        CACHED_INPUT, job_title="Sr Python Developer", company_name="Acme", location="Karachi"
+    )
+    assert lookup(semantic_cache, new_input) == (
+        "Sr Python Developer at Acme, Karachi. Good engineers at Acme build goals."
+    )
+
+
+def test_lookup_misses_for_different_role(semantic_cache):
+    assert lookup(semantic_cache, dict(CACHED_INPUT, job_title="Accountant")) is None
+
+
+@pytest.mark.parametrize(
+    "changed", [{"skills": "Python, Flask"}, {"min_salary": "200,000"}]
+)
+def test_lookup_needs_exact_match_on_other_fields(semantic_cache, changed):
+    new_input = dict(CACHED_INPUT, job_title="Sr Python Developer", **changed)
+    assert lookup(semantic_cache, new_input) is None